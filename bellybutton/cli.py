@@ -1,28 +1,40 @@
-"""Command-line interface."""
+"""
+Command-line interface.
+
+Heavier dependencies (PyYAML, lxml, astpath) are imported within the functions
+requiring them, so as to keep startup fast for e.g. pre-commit hooks.
+"""
 
 from __future__ import print_function
 
 import os
 import sys
 import argparse
-import subprocess
 from collections import namedtuple
 from textwrap import dedent
 
-from bellybutton.exceptions import InvalidNode
-from bellybutton.linting import lint_file
-from bellybutton.parsing import load_config
-
 try:
     from itertools import zip_longest
 except ImportError:
     from itertools import izip_longest as zip_longest
 
-from bellybutton.initialization import generate_config
+
+WATCH_INTERVAL = 0.1  # seconds
+
+
+class CommandParser(argparse.ArgumentParser):
+    """Subcommand parser, only adding its arguments once it is used."""
+
+    def parse_known_args(self, args=None, namespace=None):
+        fn = self.get_default('func')
+        if fn is not None and not getattr(self, 'arguments_added', False):
+            self.arguments_added = True
+            add_arguments(self, fn)
+        return super(CommandParser, self).parse_known_args(args, namespace)
 
 
 PARSER = argparse.ArgumentParser()
-SUBPARSERS = PARSER.add_subparsers()
+SUBPARSERS = PARSER.add_subparsers(parser_class=CommandParser)
 
 
 LintingFailure = namedtuple('LintingFailure', 'failure path lineno line rule')
@@ -40,7 +52,11 @@ def cli_command(fn):
     """Register function as subcommand."""
     command = SUBPARSERS.add_parser(fn.__name__, description=fn.__doc__)
     command.set_defaults(func=fn)
+    return fn
+
 
+def add_arguments(command, fn):
+    """Add arguments to subcommand parser, based on function signature."""
     unspecified = object()
     args = reversed(list(zip_longest(
         reversed(fn.__code__.co_varnames[:fn.__code__.co_argcount]),
@@ -52,6 +68,13 @@ def cli_command(fn):
         if default_value is unspecified:
             command.add_argument(argument_name)
             continue
+        if type(default_value) is tuple:
+            command.add_argument(
+                argument_name,
+                nargs='*',
+                default=default_value,
+            )
+            continue
 
         args = ['--{}'.format(argument_name)]
         kwargs = dict(
@@ -69,12 +92,12 @@ def cli_command(fn):
             **kwargs
         )
 
-    return fn
-
 
 @cli_command
 def init(project_directory='.', force=False):
     """Initialize bellybutton config for project."""
+    from bellybutton.initialization import generate_config
+
     config_path = os.path.join(project_directory, '.bellybutton.yml')
     if os.path.exists(config_path) and not force:
         message = 'ERROR: Path `{}` already initialized (use --force to ignore).'
@@ -102,6 +125,37 @@ def walk_python_files(root_dir):
     )
 
 
+def explicit_python_files(paths):
+    """
+    Get absolute paths for python source files amongst those specified,
+    skipping any which don't exist (e.g. deleted files listed by git).
+    """
+    return frozenset(
+        os.path.abspath(filepath)
+        for path in paths
+        for filepath in (
+            walk_python_files(path) if os.path.isdir(path) else (path,)
+        )
+        if os.path.splitext(filepath)[-1] == '.py'
+        and os.path.isfile(filepath)
+    )
+
+
+def read_files_from(path):
+    """Read NUL- or newline-separated paths from file, or stdin if `-`."""
+    if path == '-':
+        contents = sys.stdin.read()
+    else:
+        with open(path, 'r') as f:
+            contents = f.read()
+    separator = '\0' if '\0' in contents else '\n'
+    return [
+        filepath
+        for filepath in contents.split(separator)
+        if filepath.strip()
+    ]
+
+
 def open_python_files(filepaths):
     """For each specified filepath, yield (path, content) pairs."""
     for filepath in sorted(filepaths):
@@ -112,6 +166,8 @@ def open_python_files(filepaths):
 
 def get_git_modified(project_directory):
     """Get all modified filepaths between current ref and origin/master."""
+    import subprocess
+
     subprocess.check_call(
         'git -C "{}" fetch origin'.format(project_directory),
         shell=True
@@ -128,48 +184,144 @@ def get_git_modified(project_directory):
     )
 
 
-def linting_failures(filepaths, rules):
+def linting_failures(filepaths, rules, per_file=True, batched=True):
     """Given a set of filepaths and a set of rules, yield all rule violations."""
-    failures = 0
-    files = open_python_files(filepaths)
-    for filepath, file_contents in files:
-        linting_results = list(lint_file(filepath, file_contents, rules))
-        if not linting_results:
+    from bellybutton.linting import lint_files
+
+    # only the current file's contents are kept; batched plugin failures,
+    # which are yielded once all files have been linted, are looked up again
+    sources = {}
+
+    def read_files():
+        for filepath, file_contents in open_python_files(filepaths):
+            sources.clear()
+            sources[filepath] = file_contents
+            yield filepath, file_contents
+
+    for failure in lint_files(read_files(), rules, per_file, batched):
+        if failure.succeeded:
             continue
-        failure_results = (
-            result
-            for result in linting_results
-            if not result.succeeded
+        if failure.filepath not in sources:
+            sources.clear()
+            sources.update(open_python_files([failure.filepath]))
+        lines = sources[failure.filepath].splitlines()
+        yield LintingFailure(
+            failure=failure,
+            path=failure.filepath,
+            lineno=failure.lineno,
+            line=lines[min(failure.lineno, len(lines)) - 1] if lines else '',
+            rule=failure.rule,
         )
-        for failure in failure_results:
-            failures += 1
-            lines = file_contents.splitlines()
-            yield LintingFailure(
-                failure=failure,
-                path=filepath,
-                lineno=failure.lineno,
-                line=lines[min(failure.lineno, len(lines)) - 1] if lines else '',
-                rule=failure.rule,
-            )
 
 
-@cli_command
-def lint(modified_only=False, project_directory='.', verbose=False):
-    """Lint project."""
-    config_path = os.path.abspath(
-        os.path.join(project_directory, '.bellybutton.yml')
-    )
+def load_config_file(config_path):
+    """Load rules from config file."""
+    from bellybutton.parsing import load_config
+
+    with open(config_path, 'r') as f:
+        return load_config(f)
+
+
+def read_config(config_path):
+    """Load rules from config file, printing an error and returning None on failure."""
+    from bellybutton.exceptions import InvalidNode
+
     try:
-        with open(config_path, 'r') as f:
-            rules = load_config(f)
+        return load_config_file(config_path)
     except IOError:
         message = "ERROR: Configuration file path `{}` does not exist."
         print(error(message.format(config_path)))
-        return 1
     except InvalidNode as e:
-        message = "ERROR: {}, {}"
-        exc_message = getattr(e, 'message', str(e))
-        print(error(message.format(config_path, exc_message)))
+        print_config_error(config_path, e)
+
+
+def print_config_error(config_path, e):
+    """Report invalid configuration, e.g. a plugin rule which can't be imported."""
+    message = "ERROR: {}, {}"
+    exc_message = getattr(e, 'message', str(e))
+    print(error(message.format(config_path, exc_message)))
+
+
+def summarize(rules, filepaths, failures):
+    """Format final linting message."""
+    final_message = "Linting {} ({} rule{}, {} file{}, {} violation{}).".format(
+        'failed' if failures else 'succeeded',
+        len(rules),
+        '' if len(rules) == 1 else 's',
+        len(filepaths),
+        '' if len(filepaths) == 1 else 's',
+        failures,
+        '' if failures == 1 else 's',
+    )
+    return (error if failures else success)(final_message)
+
+
+def watch_project(watcher, report):
+    """Poll for changes, reporting any new or fixed violations."""
+    import time
+    from bellybutton.exceptions import InvalidNode
+
+    first_poll = True
+    while True:
+        fixed, added, errors = watcher.poll()
+        for e in errors:
+            if isinstance(e, InvalidNode):
+                print_config_error(watcher.config_path, e)
+            else:
+                print(error("ERROR: {}".format(getattr(e, 'message', str(e)))))
+        for failure in fixed:
+            print(success('- ') + report(failure))
+        prefix = '' if first_poll else error('+ ')
+        for failure in added:
+            print(prefix + report(failure))
+        if fixed or added or first_poll:
+            print(summarize(
+                watcher.rules,
+                watcher.results,
+                sum(len(failures) for failures in watcher.results.values()),
+            ))
+        first_poll = False
+        time.sleep(WATCH_INTERVAL)
+
+
+@cli_command
+def lint(paths=(), files_from='', modified_only=False, project_directory='.', verbose=False, watch=False):
+    """Lint project, or only the specified paths."""
+    explicit_paths = bool(paths or files_from)
+    if files_from:
+        try:
+            paths = list(paths) + read_files_from(files_from)
+        except IOError:
+            message = "ERROR: File list path `{}` does not exist."
+            print(error(message.format(files_from)))
+            return 1
+
+    dir_mtimes = {}
+    if explicit_paths:  # takes precedence over --modified-only, e.g. in hooks
+        all_filepaths = explicit_python_files(paths)
+    elif modified_only:
+        all_filepaths = get_git_modified(os.path.abspath(project_directory))
+    elif watch:
+        from bellybutton.watching import scan_directories
+
+        all_filepaths = scan_directories(
+            [os.path.abspath(project_directory)],
+            dir_mtimes
+        )
+    else:
+        all_filepaths = list(
+            walk_python_files(os.path.abspath(project_directory))
+        )
+    config_path = os.path.abspath(
+        os.path.join(project_directory, '.bellybutton.yml')
+    )
+    # the config itself is only parsed if there are files to lint
+    if not all_filepaths and not watch and os.path.isfile(config_path):
+        print(success("Linting succeeded (no files to lint)."))
+        return 0
+
+    rules = read_config(config_path)
+    if rules is None:
         return 1
 
     if verbose:
@@ -186,28 +338,49 @@ def lint(modified_only=False, project_directory='.', verbose=False):
     else:
         failure_message = "{path}:{lineno}\t{rule.name}: {rule.description}"
 
-    failures = 0
-    filepath_source = get_git_modified if modified_only else walk_python_files
-    filepaths = list(filepath_source(os.path.abspath(project_directory)))
-    for failure in linting_failures(filepaths, rules):
-        failures += 1
-        print(failure_message.format(
+    def report(failure):
+        return failure_message.format(
             path=os.path.relpath(failure.path, project_directory),
             lineno=failure.lineno,
             line=failure.line,
             rule=failure.rule
-        ))
+        )
 
-    final_message = "Linting {} ({} rule{}, {} file{}, {} violation{}).".format(
-        'failed' if failures else 'succeeded',
-        len(rules),
-        '' if len(rules) == 1 else 's',
-        len(filepaths),
-        '' if len(filepaths) == 1 else 's',
-        failures,
-        '' if failures == 1 else 's',
-    )
-    print((error if failures else success)(final_message))
+    if watch:
+        from bellybutton.watching import ProjectWatcher
+
+        watcher = ProjectWatcher(
+            config_path,
+            rules,
+            all_filepaths,
+            dir_mtimes,
+            load_rules=load_config_file,
+            lint=linting_failures,
+        )
+        try:
+            watch_project(watcher, report)
+        except KeyboardInterrupt:
+            return 0
+
+    from bellybutton.exceptions import InvalidNode
+    from bellybutton.linting import rule_settings_match
+
+    filepaths = [
+        filepath
+        for filepath in all_filepaths
+        if any(rule_settings_match(rule, filepath) for rule in rules)
+    ]
+
+    failures = 0
+    try:
+        for failure in linting_failures(filepaths, rules):
+            failures += 1
+            print(report(failure))
+    except InvalidNode as e:
+        print_config_error(config_path, e)
+        return 1
+
+    print(summarize(rules, filepaths, failures))
     return 1 if failures else 0
 
 
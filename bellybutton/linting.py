@@ -1,14 +1,19 @@
 """Linting engine."""
 
 import re
+import ast
 import fnmatch
 import tokenize
 from collections import namedtuple
 from operator import attrgetter
 
-from astpath import find_in_ast, file_contents_to_xml_ast
+from astpath import find_in_ast
+from astpath.asts import convert_to_xml
 from lxml.etree import XPath
 
+from bellybutton.exceptions import InvalidNode
+from bellybutton.plugins import PythonPlugin, PluginContext, load_plugin
+
 try:
     from re import Pattern as pattern_type
 except ImportError:
@@ -42,6 +47,27 @@ def rule_settings_match(rule, filepath):
     return should_be_included and not should_be_excluded
 
 
+def load_rule_plugin(rule):
+    """Import function for plugin rule, raising InvalidNode if this fails."""
+    try:
+        return load_plugin(rule.expr)
+    except Exception as e:
+        raise InvalidNode("rule `{}`: cannot load plugin `{}:{}` ({}).".format(
+            rule.name,
+            rule.expr.module,
+            rule.expr.function,
+            getattr(e, 'message', str(e)),
+        ))
+
+
+def is_batched_rule(rule):
+    """Return whether rule is a batched plugin rule, importing the plugin."""
+    return (
+        isinstance(rule.expr, PythonPlugin)
+        and getattr(load_rule_plugin(rule), 'batched', False)
+    )
+
+
 def lint_file(filepath, file_contents, rules):
     """Run rules against file, yielding any failures."""
     matching_rules = [
@@ -52,13 +78,27 @@ def lint_file(filepath, file_contents, rules):
     if not matching_rules:
         return
 
+    context = PluginContext(
+        filepath=filepath,
+        file_contents=file_contents,
+        tree=ast.parse(file_contents, filepath),
+    )
+    for result in _lint_context(context, matching_rules):
+        yield result
+
+
+def _lint_context(context, rules):
+    """Run rules against already-parsed file, yielding any failures."""
+    filepath, file_contents = context.filepath, context.file_contents
     ignored_lines = get_ignored_lines(file_contents)
-    xml_ast = file_contents_to_xml_ast(file_contents)  # todo - use caching module?
+    xml_ast = None
 
-    for rule in sorted(matching_rules, key=attrgetter('name')):
+    for rule in sorted(rules, key=attrgetter('name')):
         # TODO - hacky - need to find better way to do this (while keeping chain)
         # TODO - possibly having both filepath and contents/input supplied?
         if isinstance(rule.expr, XPath):
+            if xml_ast is None:
+                xml_ast = convert_to_xml(context.tree)  # todo - use caching module?
             matching_lines = set(find_in_ast(
                 xml_ast,
                 rule.expr.path,
@@ -69,6 +109,16 @@ def lint_file(filepath, file_contents, rules):
                 file_contents[:match.start()].count('\n') + 1  # TODO - slow
                 for match in re.finditer(rule.expr, file_contents)
             }
+        elif isinstance(rule.expr, PythonPlugin):
+            plugin = load_rule_plugin(rule)
+            if getattr(plugin, 'batched', False):
+                matching_lines = {
+                    lineno
+                    for path, lineno in plugin([context])
+                    if path == filepath
+                }
+            else:
+                matching_lines = set(plugin(context))
         elif callable(rule.expr):
             matching_lines = set(rule.expr(file_contents))
         else:
@@ -82,3 +132,77 @@ def lint_file(filepath, file_contents, rules):
 
         for line in matching_lines:
             yield LintingResult(rule, filepath, succeeded=False, lineno=line)
+
+
+def _lint_batch(rule, contexts):
+    """Run batched plugin rule once over many files, yielding any failures."""
+    plugin = load_rule_plugin(rule)
+    matching_lines = {context.filepath: set() for context in contexts}
+    for filepath, lineno in plugin(contexts):
+        if filepath in matching_lines:  # ignore files outside rule's scope
+            matching_lines[filepath].add(lineno)
+
+    file_contents = {
+        context.filepath: context.file_contents
+        for context in contexts
+    }
+    for filepath in sorted(matching_lines):
+        lines = matching_lines[filepath]
+        if rule.settings.allow_ignore:
+            lines -= get_ignored_lines(file_contents[filepath])
+
+        if not lines:
+            yield LintingResult(rule, filepath, succeeded=True, lineno=None)
+
+        for line in lines:
+            yield LintingResult(rule, filepath, succeeded=False, lineno=line)
+
+
+def lint_files(files, rules, per_file=True, batched=True):
+    """
+    Run rules against (filepath, file_contents) pairs, yielding any failures.
+
+    Each file is parsed once, with the resulting AST shared between all rules.
+    Batched plugin rules are run once all files have been read. Plugins are
+    only imported once their rule first applies to a file. Either per-file or
+    batched rules may be skipped, using the `per_file` and `batched` flags.
+    """
+    is_batched = {}  # rule name -> whether rule is a batched plugin rule
+    batches = {}  # rule name -> (rule, contexts)
+
+    for filepath, file_contents in files:
+        matching_rules = [
+            rule
+            for rule in rules
+            if rule_settings_match(rule, filepath)
+        ]
+        for rule in matching_rules:
+            if rule.name not in is_batched:
+                is_batched[rule.name] = is_batched_rule(rule)
+        batched_rules = [
+            rule
+            for rule in matching_rules
+            if batched and is_batched[rule.name]
+        ]
+        file_rules = [
+            rule
+            for rule in matching_rules
+            if per_file and not is_batched[rule.name]
+        ]
+        if not batched_rules and not file_rules:
+            continue
+
+        context = PluginContext(
+            filepath=filepath,
+            file_contents=file_contents,
+            tree=ast.parse(file_contents, filepath),
+        )
+        for rule in batched_rules:
+            batches.setdefault(rule.name, (rule, []))[1].append(context)
+        for result in _lint_context(context, file_rules):
+            yield result
+
+    for rule_name in sorted(batches):
+        rule, contexts = batches[rule_name]
+        for result in _lint_batch(rule, contexts):
+            yield result
@@ -10,6 +10,7 @@ from lxml.etree import XPath
 from astpath.search import find_in_ast, file_contents_to_xml_ast
 
 from bellybutton.exceptions import InvalidNode
+from bellybutton.plugins import PythonPlugin, plugin_search_path
 
 
 def constructor(tag=None, pattern=None):
@@ -70,6 +71,23 @@ def regex(loader, node):
     return re.compile(value, re.MULTILINE)
 
 
+@constructor
+@_reraise_with_line_no
+def python(loader, node):
+    """Construct references to Python plugin functions."""
+    value = loader.construct_scalar(node)
+    module, _, function = value.partition(':')
+    if not module or not function:
+        raise ValueError(
+            "expected `module:function`, got `{}`".format(value)
+        )
+    return PythonPlugin(
+        module=module,
+        function=function,
+        search_path=plugin_search_path(loader.name),
+    )
+
+
 @constructor
 @_reraise_with_line_no
 def verbal(loader, node):
@@ -133,7 +151,8 @@ def parse_rule(rule_name, rule_values, default_settings=None):
     rule_expr = rule_values.get('expr')
     if rule_expr is None:
         raise InvalidNode("No expression provided.".format(rule_name))
-    matches = (
+    # plugins are imported lazily, so their examples can't be checked here
+    matches = None if isinstance(rule_expr, PythonPlugin) else (
         lambda x: find_in_ast(
             file_contents_to_xml_ast(x),
             rule_expr.path,
@@ -146,13 +165,13 @@ def parse_rule(rule_name, rule_values, default_settings=None):
     rule_example = rule_values.get('example')
     if rule_example is not None:
         validate_syntax(rule_example, clause_type='example')
-        if not matches(rule_example):
+        if matches is not None and not matches(rule_example):
             raise InvalidNode("`example` clause is not matched by expression.")
 
     rule_instead = rule_values.get('instead')
     if rule_instead is not None:
         validate_syntax(rule_instead, clause_type='instead')
-        if matches(rule_instead):
+        if matches is not None and matches(rule_instead):
             raise InvalidNode("`instead` clause is matched by expression.")
 
     rule_settings = rule_values.get('settings', default_settings)
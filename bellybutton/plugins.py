@@ -0,0 +1,60 @@
+"""Python plugin rules."""
+
+import os
+import sys
+import importlib
+from functools import reduce
+from collections import namedtuple
+
+
+PythonPlugin = namedtuple('PythonPlugin', 'module function search_path')
+
+PluginContext = namedtuple('PluginContext', 'filepath file_contents tree')
+
+
+_LOADED_PLUGINS = {}
+
+
+def batched(fn):
+    """
+    Mark plugin function as batched.
+
+    Batched plugins are called once with a list of PluginContexts (one for
+    each file the rule applies to) and should yield (filepath, lineno) pairs,
+    rather than being called once per file and yielding line numbers.
+    """
+    fn.batched = True
+    return fn
+
+
+def load_plugin(plugin):
+    """Import the function referenced by plugin, caching it per-process."""
+    try:
+        return _LOADED_PLUGINS[plugin]
+    except KeyError:
+        pass
+
+    if plugin.search_path and plugin.search_path not in sys.path:
+        sys.path.append(plugin.search_path)
+    module = importlib.import_module(plugin.module)
+    fn = reduce(getattr, plugin.function.split('.'), module)
+    if not callable(fn):
+        raise TypeError("`{}:{}` is not callable.".format(
+            plugin.module,
+            plugin.function,
+        ))
+    _LOADED_PLUGINS[plugin] = fn
+    return fn
+
+
+def is_loaded(plugin):
+    """Return whether plugin has already been imported in this process."""
+    return plugin in _LOADED_PLUGINS
+
+
+def plugin_search_path(config_path):
+    """Return directory to import plugins from, given config file path."""
+    dirname = os.path.dirname(config_path)
+    if not dirname or not os.path.isdir(dirname):
+        return None
+    return os.path.abspath(dirname)
@@ -0,0 +1,302 @@
+"""Incremental re-linting of changed files."""
+
+import os
+
+from bellybutton.exceptions import InvalidNode
+from bellybutton.linting import (
+    rule_settings_match,
+    is_batched_rule,
+    load_rule_plugin,
+)
+from bellybutton.plugins import PythonPlugin, is_loaded
+
+
+def get_mtimes(paths):
+    """Get modification times of those specified paths which exist."""
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime
+        except OSError:
+            continue
+    return mtimes
+
+
+def scan_directories(directories, dir_mtimes):
+    """Walk directories, recording their mtimes, returning python file paths."""
+    filepaths = set()
+    for directory in directories:
+        for root, _, fnames in os.walk(directory):
+            dir_mtimes.update(get_mtimes([root]))
+            filepaths.update(
+                os.path.join(root, fname)
+                for fname in fnames
+                if os.path.splitext(fname)[-1] == '.py'
+            )
+    return filepaths
+
+
+def rescan_directories(dir_mtimes, filepaths):
+    """
+    Update set of python file paths, re-listing only those directories whose
+    mtimes have changed (i.e. which have had entries added or removed).
+    """
+    current_mtimes = get_mtimes(dir_mtimes)
+    changed = [
+        directory
+        for directory, mtime in dir_mtimes.items()
+        if current_mtimes.get(directory) != mtime
+    ]
+    if not changed:
+        return filepaths
+
+    filepaths = set(filepaths)
+    for directory in changed:
+        del dir_mtimes[directory]
+        filepaths = {
+            filepath
+            for filepath in filepaths
+            if os.path.dirname(filepath) != directory
+        }
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue  # removed; its subdirectories will also have changed
+        dir_mtimes[directory] = current_mtimes[directory]
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                if path not in dir_mtimes:
+                    filepaths |= scan_directories([path], dir_mtimes)
+            elif os.path.splitext(name)[-1] == '.py':
+                filepaths.add(path)
+    return filepaths
+
+
+def _rule_signature(rule):
+    """Get comparable representation of rule, for detecting config changes."""
+    return rule._replace(expr=getattr(rule.expr, 'path', rule.expr))
+
+
+def _violation_key(failure):
+    return failure.path, failure.lineno, failure.rule.name
+
+
+class ProjectWatcher(object):
+    """
+    Incrementally re-lints python files as they, or the config, change.
+
+    Only in-scope files (those to which some rule applies) are polled; this
+    set is only recomputed when the rules change or files are added. Each
+    file is re-linted independently, and its mtime is only recorded once it
+    has been linted successfully; files which fail to lint (e.g. when saved
+    mid-edit with a syntax error) have their results dropped until they are
+    next changed.
+
+    As file I/O is left to the CLI, `load_rules(config_path)` and
+    `lint(filepaths, rules, per_file, batched)` are used to read the config
+    and to lint files, respectively.
+    """
+
+    def __init__(self, config_path, rules, filepaths, dir_mtimes, load_rules, lint):
+        self.config_path = config_path
+        self.config_mtime = get_mtimes([config_path]).get(config_path)
+        self.rules = rules
+        self.filepaths = filepaths
+        self.in_scope = {
+            filepath
+            for filepath in filepaths
+            if self.matches(filepath)
+        }
+        self.dir_mtimes = dir_mtimes
+        self.file_mtimes = {}
+        self.broken_mtimes = {}
+        self.results = {}
+        self.load_rules = load_rules
+        self.lint = lint
+        self.previous = {}
+        self.errors = []
+
+    def matches(self, filepath, rules=None):
+        return any(
+            rule_settings_match(rule, filepath)
+            for rule in (self.rules if rules is None else rules)
+        )
+
+    def poll(self):
+        """
+        Re-lint anything changed since last poll, returning fixed and new
+        violations, along with any errors encountered.
+        """
+        self.previous = {}
+        self.errors = []
+        self.check_config()
+        self.check_files()
+        previous = {
+            _violation_key(failure): failure
+            for failures in self.previous.values()
+            for failure in failures
+        }
+        current = {
+            _violation_key(failure): failure
+            for filepath in self.previous
+            for failure in self.results.get(filepath, ())
+        }
+        fixed = [previous[key] for key in sorted(set(previous) - set(current))]
+        added = [current[key] for key in sorted(set(current) - set(previous))]
+        return fixed, added, self.errors
+
+    def set_results(self, filepath, failures):
+        self.previous.setdefault(filepath, self.results.get(filepath, []))
+        if failures is None:
+            self.results.pop(filepath, None)
+            self.file_mtimes.pop(filepath, None)
+            self.broken_mtimes.pop(filepath, None)
+        else:
+            self.results[filepath] = failures
+
+    def relint(self, filepaths, rules):
+        """
+        Re-run (per-file) rules on each file, replacing their previous
+        results. Files whose mtimes are already recorded keep them, so that
+        changes made while only some rules were re-run are still picked up.
+        """
+        rule_names = {rule.name for rule in rules}
+        for filepath in filepaths:
+            mtime = get_mtimes([filepath]).get(filepath)
+            try:
+                failures = list(self.lint([filepath], rules, True, False))
+            except (IOError, SyntaxError, InvalidNode) as e:
+                self.errors.append(e)
+                self.set_results(filepath, [])
+                self.file_mtimes.pop(filepath, None)
+                self.broken_mtimes[filepath] = mtime
+                continue
+            self.set_results(filepath, [
+                failure
+                for failure in self.results.get(filepath, ())
+                if failure.rule.name not in rule_names
+            ] + failures)
+            self.broken_mtimes.pop(filepath, None)
+            self.file_mtimes.setdefault(filepath, mtime)
+
+    def relint_batched(self):
+        """Re-run batched plugin rules across all in-scope files."""
+        # batched rules applying to any file will already have been imported
+        batched_rules = [
+            rule
+            for rule in self.rules
+            if isinstance(rule.expr, PythonPlugin)
+            and is_loaded(rule.expr)
+            and is_batched_rule(rule)
+        ]
+        if not batched_rules:
+            return
+        rule_names = {rule.name for rule in batched_rules}
+        filepaths = sorted(self.in_scope - set(self.broken_mtimes))
+        try:
+            failures = list(self.lint(filepaths, batched_rules, False, True))
+        except (IOError, SyntaxError, InvalidNode) as e:
+            self.errors.append(e)
+            return
+        updated = {
+            filepath: [
+                failure
+                for failure in self.results.get(filepath, ())
+                if failure.rule.name not in rule_names
+            ]
+            for filepath in filepaths
+        }
+        for failure in failures:
+            if failure.path in updated:
+                updated[failure.path].append(failure)
+        for filepath, failures in updated.items():
+            if failures != self.results.get(filepath):
+                self.set_results(filepath, failures)
+
+    def check_config(self):
+        """Reload config if changed, re-running only new or modified rules."""
+        config_mtime = get_mtimes([self.config_path]).get(self.config_path)
+        if config_mtime == self.config_mtime:
+            return
+        self.config_mtime = config_mtime
+        try:
+            rules = self.load_rules(self.config_path)
+        except (IOError, InvalidNode) as e:
+            self.errors.append(e)
+            return
+
+        signatures = {rule.name: _rule_signature(rule) for rule in self.rules}
+        changed_rules = [
+            rule
+            for rule in rules
+            if signatures.get(rule.name) != _rule_signature(rule)
+        ]
+        in_scope = {
+            filepath
+            for filepath in self.filepaths
+            if self.matches(filepath, rules)
+        }
+        # import changed plugins before committing to the new rules, so that
+        # a broken plugin is reported once, rather than for every file
+        try:
+            for rule in changed_rules:
+                if isinstance(rule.expr, PythonPlugin) and any(
+                    rule_settings_match(rule, filepath)
+                    for filepath in in_scope
+                ):
+                    load_rule_plugin(rule)
+        except InvalidNode as e:
+            self.errors.append(e)
+            return
+
+        stale_names = (
+            set(signatures) - {rule.name for rule in rules}
+            | {rule.name for rule in changed_rules}
+        )
+        self.rules = rules
+        for filepath in self.in_scope - in_scope:
+            self.set_results(filepath, None)
+        self.in_scope = in_scope
+        for filepath in in_scope:
+            failures = self.results.get(filepath, ())
+            if any(failure.rule.name in stale_names for failure in failures):
+                self.set_results(filepath, [
+                    failure
+                    for failure in failures
+                    if failure.rule.name not in stale_names
+                ])
+        if changed_rules:
+            self.relint(sorted(in_scope - set(self.broken_mtimes)), changed_rules)
+        self.relint_batched()
+
+    def check_files(self):
+        """Re-lint those in-scope files which have changed."""
+        if self.dir_mtimes:
+            filepaths = rescan_directories(self.dir_mtimes, self.filepaths)
+            if filepaths is not self.filepaths:
+                removed = self.filepaths - filepaths
+                added = filepaths - self.filepaths
+                self.filepaths = filepaths
+                self.in_scope -= removed
+                self.in_scope.update(
+                    filepath
+                    for filepath in added
+                    if self.matches(filepath)
+                )
+
+        mtimes = get_mtimes(self.in_scope)
+        removed = set(self.results) - set(mtimes)
+        for filepath in removed:
+            self.set_results(filepath, None)
+        changed = sorted(
+            filepath
+            for filepath, mtime in mtimes.items()
+            if mtime != self.file_mtimes.get(filepath)
+            and mtime != self.broken_mtimes.get(filepath)
+        )
+        for filepath in changed:
+            self.file_mtimes.pop(filepath, None)
+        self.relint(changed, self.rules)
+        if changed or removed:
+            self.relint_batched()
@@ -0,0 +1,59 @@
+"""
+Benchmark bellybutton CLI startup time.
+
+Runs each command repeatedly in a fresh subprocess (as pre-commit hooks and
+build tools do) and reports the fastest and median wall-clock times, along
+with those of a bare interpreter for reference.
+
+Usage: python benchmarks/startup.py [repeats]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+from timeit import default_timer
+
+
+COMMANDS = (
+    ('python (baseline)', [sys.executable, '-c', 'pass']),
+    ('bellybutton --help', [sys.executable, '-m', 'bellybutton.cli', '--help']),
+    ('bellybutton init', [sys.executable, '-m', 'bellybutton.cli', 'init', '--force']),
+    ('bellybutton lint (no files)', [sys.executable, '-m', 'bellybutton.cli', 'lint']),
+)
+
+
+def time_command(command, cwd, repeats):
+    """Return sorted wall-clock times, in ms, of running command."""
+    timings = []
+    with open(os.devnull, 'w') as devnull:
+        for _ in range(repeats):
+            start = default_timer()
+            subprocess.call(command, cwd=cwd, stdout=devnull, stderr=devnull)
+            timings.append((default_timer() - start) * 1000)
+    return sorted(timings)
+
+
+def main(repeats=30):
+    project_directory = tempfile.mkdtemp()
+    env_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.environ['PYTHONPATH'] = os.pathsep.join(
+        filter(None, (env_path, os.environ.get('PYTHONPATH')))
+    )
+    try:
+        for name, command in COMMANDS:
+            timings = time_command(command, project_directory, repeats)
+            print('{:<30}min {:7.1f}ms    median {:7.1f}ms'.format(
+                name,
+                timings[0],
+                timings[len(timings) // 2],
+            ))
+    finally:
+        shutil.rmtree(project_directory)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
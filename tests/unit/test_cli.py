@@ -1,5 +1,8 @@
 """Unit tests for bellybutton/cli.py"""
 
+import sys
+import subprocess
+
 import pytest
 
 from bellybutton import cli
@@ -19,3 +22,104 @@ def test_interface_exposes_subcommands(fn, options):
     assert cli.PARSER.parse_args(
         '{.__name__}{}'.format(fn, options).split()
     ).func is fn
+
+
+@pytest.mark.parametrize('options,expected', (
+    ('', []),
+    (' a.py', ['a.py']),
+    (' a.py b.py --files-from -', ['a.py', 'b.py']),
+))
+def test_lint_accepts_paths(options, expected):
+    """Ensure lint subcommand accepts explicit paths."""
+    assert list(cli.PARSER.parse_args(
+        'lint{}'.format(options).split()
+    ).paths) == expected
+
+
+@pytest.mark.parametrize('contents', (
+    'a.py\0b c.py\0',
+    'a.py\nb c.py\n',
+))
+def test_read_files_from(tmpdir, contents):
+    """Ensure file lists may be NUL- or newline-separated."""
+    files_from = tmpdir.join('files')
+    files_from.write(contents)
+    assert cli.read_files_from(str(files_from)) == ['a.py', 'b c.py']
+
+
+def test_explicit_python_files(tmpdir):
+    """Ensure explicit paths are filtered to python sources, expanding dirs."""
+    tmpdir.join('a.py').write('')
+    tmpdir.join('b.txt').write('')
+    tmpdir.mkdir('pkg').join('c.py').write('')
+    assert cli.explicit_python_files([
+        str(tmpdir.join('a.py')),
+        str(tmpdir.join('b.txt')),
+        str(tmpdir.join('pkg')),
+    ]) == {
+        str(tmpdir.join('a.py')),
+        str(tmpdir.join('pkg', 'c.py')),
+    }
+
+
+def test_heavy_dependencies_imported_lazily():
+    """Ensure CLI startup doesn't import PyYAML, lxml or astpath."""
+    subprocess.check_call([
+        sys.executable,
+        '-c',
+        'import sys, bellybutton.cli; '
+        'sys.exit(any(module.split(".")[0] in ("yaml", "lxml", "astpath") '
+        'for module in sys.modules))',
+    ])
+
+
+def test_lint_explicit_paths(tmpdir, monkeypatch):
+    """
+    Ensure linting explicit paths neither walks the project nor calls git,
+    and never opens files to which no rules apply.
+    """
+    tmpdir.join('.bellybutton.yml').write(
+        'default_settings: !settings\n'
+        '  included: [~+/pkg/*]\n'
+        '  excluded: []\n'
+        '  allow_ignore: yes\n'
+        'rules:\n'
+        '  NoGlobal:\n'
+        '    description: No globals.\n'
+        '    expr: //Global\n'
+    )
+    pkg = tmpdir.mkdir('pkg')
+    pkg.join('a.py').write('def f():\n    global x\n')
+    tmpdir.mkdir('other').join('b.py').write('def f():\n    global x\n')
+
+    def fail(*args):
+        raise AssertionError("unexpected file discovery")
+
+    opened = []
+    open_python_files = cli.open_python_files
+
+    def spy(filepaths):
+        filepaths = list(filepaths)
+        opened.extend(filepaths)
+        return open_python_files(filepaths)
+
+    monkeypatch.setattr(cli, 'walk_python_files', fail)
+    monkeypatch.setattr(cli, 'get_git_modified', fail)
+    monkeypatch.setattr(cli, 'open_python_files', spy)
+    assert cli.lint(
+        paths=[
+            str(pkg.join('a.py')),
+            str(tmpdir.join('other', 'b.py')),
+            str(pkg.join('deleted.py')),
+        ],
+        modified_only=True,
+        project_directory=str(tmpdir),
+    ) == 1
+    assert opened == [str(pkg.join('a.py'))]
+
+
+def test_lint_without_files_requires_config(tmpdir):
+    """Ensure linting exits early when there's nothing to lint, given a config."""
+    assert cli.lint(project_directory=str(tmpdir)) == 1
+    tmpdir.join('.bellybutton.yml').write('')
+    assert cli.lint(project_directory=str(tmpdir)) == 0
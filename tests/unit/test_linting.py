@@ -0,0 +1,139 @@
+"""Unit tests for bellybutton/linting.py"""
+
+import ast
+import pickle
+
+import pytest
+
+from bellybutton.exceptions import InvalidNode
+from bellybutton.linting import lint_file, lint_files
+from bellybutton.parsing import Rule, Settings
+from bellybutton.plugins import PythonPlugin, batched
+
+
+ALL_FILES = Settings(included=['*'], excluded=[], allow_ignore=True)
+
+
+def global_statements(context):
+    """Example per-file plugin."""
+    assert isinstance(context.tree, ast.Module)
+    return (
+        node.lineno
+        for node in ast.walk(context.tree)
+        if isinstance(node, ast.Global)
+    )
+
+
+@batched
+def duplicate_functions(contexts):
+    """Example batched plugin, finding functions defined in many files."""
+    seen = {}
+    for context in contexts:
+        for node in context.tree.body:
+            if not isinstance(node, ast.FunctionDef):
+                continue
+            if node.name in seen:
+                yield context.filepath, node.lineno
+            seen[node.name] = context.filepath
+
+
+@batched
+def stray_paths(contexts):
+    """Example batched plugin, reporting files it wasn't given."""
+    for context in contexts:
+        yield context.filepath, 1
+        yield './' + context.filepath, 1
+    yield 'elsewhere.py', 1
+
+
+def plugin_rule(function, settings=ALL_FILES):
+    return Rule(
+        name=function,
+        description='',
+        expr=PythonPlugin(__name__, function, None),
+        example=None,
+        instead=None,
+        settings=settings,
+    )
+
+
+def test_python_plugin_picklable():
+    """Ensure plugin references can be sent to worker processes."""
+    rule = plugin_rule('global_statements')
+    assert pickle.loads(pickle.dumps(rule.expr)) == rule.expr
+
+
+def test_lint_file_plugin():
+    """Ensure per-file plugins receive the parsed AST."""
+    contents = "x = 1\ndef f():\n    global x\n    global y  # bb: ignore\n"
+    results = list(lint_file('a.py', contents, [plugin_rule('global_statements')]))
+    assert [result.lineno for result in results if not result.succeeded] == [3]
+
+
+def test_lint_files_batched_plugin():
+    """Ensure batched plugins are run once over all matching files."""
+    files = [
+        ('a.py', "def f():\n    pass\n"),
+        ('b.py', "x = 1\ndef f():\n    pass\n"),
+        ('c.py', "def f():\n    pass\n"),
+    ]
+    settings = Settings(included=['*'], excluded=['c.py'], allow_ignore=True)
+    results = list(lint_files(files, [
+        plugin_rule('duplicate_functions', settings),
+        plugin_rule('global_statements'),
+    ]))
+    failures = [
+        (result.filepath, result.lineno)
+        for result in results
+        if not result.succeeded
+    ]
+    assert failures == [('b.py', 2)]
+
+
+def test_lint_files_batched_plugin_scope():
+    """Ensure batched plugins can't report files outside the rule's scope."""
+    files = [
+        ('a.py', "x = 1\n"),
+        ('b.py', "x = 1  # bb: ignore\n"),
+    ]
+    failures = [
+        (result.filepath, result.lineno)
+        for result in lint_files(files, [plugin_rule('stray_paths')])
+        if not result.succeeded
+    ]
+    assert failures == [('a.py', 1)]
+
+
+def test_plugins_loaded_lazily():
+    """Ensure plugins are only imported once their rule applies to a file."""
+    settings = Settings(included=['*.py'], excluded=[], allow_ignore=True)
+    rule = plugin_rule('global_statements', settings)
+    missing = rule._replace(
+        name='Missing',
+        expr=PythonPlugin('not_a_module', 'fn', None),
+        settings=Settings(included=['*.pyx'], excluded=[], allow_ignore=True),
+    )
+    assert not [
+        result
+        for result in lint_files([('a.py', 'x = 1\n')], [rule, missing])
+        if not result.succeeded
+    ]
+
+
+def test_plugin_import_failure():
+    """Ensure plugins which can't be imported are reported as config errors."""
+    rule = plugin_rule('not_a_function')
+    with pytest.raises(InvalidNode) as excinfo:
+        list(lint_file('a.py', 'x = 1\n', [rule]))
+    assert '`not_a_function`' in str(excinfo.value)
+
+
+def test_plugin_import_error(tmpdir):
+    """Ensure errors raised while importing plugins are reported as config errors."""
+    tmpdir.join('broken_plugin.py').write('def f(:\n')
+    rule = plugin_rule('f')._replace(
+        expr=PythonPlugin('broken_plugin', 'f', str(tmpdir)),
+    )
+    with pytest.raises(InvalidNode) as excinfo:
+        list(lint_file('a.py', 'x = 1\n', [rule]))
+    assert 'rule `f`' in str(excinfo.value)
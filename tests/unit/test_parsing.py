@@ -9,6 +9,7 @@ from lxml.etree import XPath, XPathSyntaxError
 
 from bellybutton.exceptions import InvalidNode
 from bellybutton.parsing import Settings, parse_rule, Rule
+from bellybutton.plugins import PythonPlugin
 
 try:
     from re import Pattern as pattern_type
@@ -21,6 +22,8 @@ except ImportError:
     pytest.mark.xfail(('//[]', XPath), raises=InvalidNode),
     ('!regex .*', pattern_type),
     pytest.mark.xfail(('!regex "*"', pattern_type), raises=InvalidNode),
+    ('!python module:function', PythonPlugin),
+    pytest.mark.xfail(('!python module', PythonPlugin), raises=InvalidNode),
     ('!settings {included: [], excluded: [], allow_ignore: yes}', Settings),
     pytest.mark.xfail(('!settings {}', Settings), raises=InvalidNode)
 ))
@@ -83,3 +86,11 @@ def test_parse_rule_validates_code_examples(kwargs):
                 **kwargs
             )
         )
+
+
+def test_python_constructor_lazy():
+    """Ensure !python nodes are parsed without importing the plugin."""
+    assert yaml.load(
+        '!python not_a_module:fn',
+        Loader=yaml.FullLoader
+    ) == PythonPlugin(module='not_a_module', function='fn', search_path=None)
@@ -0,0 +1,174 @@
+"""Unit tests for bellybutton/watching.py"""
+
+import os
+
+from bellybutton import cli, watching
+
+
+def test_rescan_directories(tmpdir):
+    """Ensure only changed directories are re-listed when watching."""
+    tmpdir.join('a.py').write('')
+    dir_mtimes = {}
+    filepaths = watching.scan_directories([str(tmpdir)], dir_mtimes)
+    assert filepaths == {str(tmpdir.join('a.py'))}
+    assert watching.rescan_directories(dir_mtimes, filepaths) is filepaths
+
+    tmpdir.join('a.py').remove()
+    subdir = tmpdir.mkdir('pkg')
+    subdir.join('b.py').write('')
+    subdir.join('c.txt').write('')
+    dir_mtimes[str(tmpdir)] = None  # mtime resolution may be coarse
+    assert watching.rescan_directories(dir_mtimes, filepaths) == {
+        str(subdir.join('b.py')),
+    }
+    assert set(dir_mtimes) == {str(tmpdir), str(subdir)}
+
+
+CONFIG_TEMPLATE = (
+    'default_settings: !settings\n'
+    '  included: [~+/*]\n'
+    '  excluded: []\n'
+    '  allow_ignore: yes\n'
+    'rules:\n'
+    '  NoGlobal:\n'
+    '    description: No globals.\n'
+    '    expr: //Global\n'
+    '{}'
+)
+
+MTIME = [1000000000]
+
+
+def save(path, contents):
+    path.write(contents)
+    MTIME[0] += 10  # mtime resolution may be coarse
+    os.utime(str(path), (MTIME[0], MTIME[0]))
+
+
+def violations(failures):
+    return sorted(
+        (os.path.basename(failure.path), failure.lineno, failure.rule.name)
+        for failure in failures
+    )
+
+
+def make_watcher(tmpdir):
+    config = str(tmpdir.join('.bellybutton.yml'))
+    dir_mtimes = {}
+    return watching.ProjectWatcher(
+        config,
+        cli.load_config_file(config),
+        watching.scan_directories([str(tmpdir)], dir_mtimes),
+        dir_mtimes,
+        load_rules=cli.load_config_file,
+        lint=cli.linting_failures,
+    )
+
+
+def test_project_watcher(tmpdir):
+    """
+    Ensure the watcher re-lints changed files independently, recovering from
+    broken saves, and re-runs only changed rules when the config changes.
+    """
+    config = tmpdir.join('.bellybutton.yml')
+    save(config, CONFIG_TEMPLATE.format(''))
+    a = tmpdir.join('a.py')
+    b = tmpdir.join('b.py')
+    save(a, 'def f():\n    global x\n')
+    save(b, 'def g(:\n')
+    watcher = make_watcher(tmpdir)
+
+    fixed, added, errors = watcher.poll()
+    assert violations(added) == [('a.py', 2, 'NoGlobal')]
+    assert [type(e) for e in errors] == [SyntaxError]
+    assert watcher.poll() == ([], [], [])
+
+    save(b, 'x = 1\n')
+    assert watcher.poll() == ([], [], [])
+
+    # fix a.py while saving b.py mid-edit, in the same poll
+    save(a, 'def f():\n    pass\n')
+    save(b, 'def g(:\n')
+    fixed, added, errors = watcher.poll()
+    assert violations(fixed) == [('a.py', 2, 'NoGlobal')]
+    assert len(errors) == 1
+    assert watcher.poll() == ([], [], [])
+
+    save(b, 'def g():\n    global y\n')
+    fixed, added, errors = watcher.poll()
+    assert (violations(fixed), violations(added)) == (
+        [], [('b.py', 2, 'NoGlobal')]
+    )
+
+    save(config, CONFIG_TEMPLATE.format(
+        '  NoFunctions:\n'
+        '    description: No functions.\n'
+        '    expr: //FunctionDef\n'
+    ))
+    fixed, added, errors = watcher.poll()
+    assert (violations(fixed), violations(added)) == ([], [
+        ('a.py', 1, 'NoFunctions'),
+        ('b.py', 1, 'NoFunctions'),
+    ])
+
+    save(config, CONFIG_TEMPLATE.format(''))
+    fixed, added, errors = watcher.poll()
+    assert (violations(fixed), violations(added)) == ([
+        ('a.py', 1, 'NoFunctions'),
+        ('b.py', 1, 'NoFunctions'),
+    ], [])
+    assert violations(
+        failure
+        for failures in watcher.results.values()
+        for failure in failures
+    ) == [('b.py', 2, 'NoGlobal')]
+
+
+def test_project_watcher_unimportable_plugin(tmpdir):
+    """Ensure a config edit adding a broken plugin is reported only once."""
+    config = tmpdir.join('.bellybutton.yml')
+    save(config, CONFIG_TEMPLATE.format(''))
+    a = tmpdir.join('a.py')
+    save(a, 'def f():\n    global x\n')
+    watcher = make_watcher(tmpdir)
+    watcher.poll()
+
+    save(config, CONFIG_TEMPLATE.format(
+        '  Missing:\n'
+        '    description: Missing plugin.\n'
+        '    expr: !python not_a_module:fn\n'
+    ))
+    fixed, added, errors = watcher.poll()
+    assert (fixed, added, len(errors)) == ([], [], 1)
+    assert [rule.name for rule in watcher.rules] == ['NoGlobal']
+
+    save(a, 'def f():\n    global y\n')
+    assert watcher.poll()[2] == []
+    assert watcher.poll() == ([], [], [])
+
+
+def test_project_watcher_batched_plugin(tmpdir):
+    """Ensure batched plugins reporting unlinted paths don't break watching."""
+    tmpdir.join('watching_stray_plugin.py').write(
+        'from bellybutton.plugins import batched\n'
+        '@batched\n'
+        'def stray(contexts):\n'
+        '    for context in contexts:\n'
+        '        yield context.filepath, 1\n'
+        '        yield "./a.py", 1\n'
+    )
+    config = tmpdir.join('.bellybutton.yml')
+    save(config, CONFIG_TEMPLATE.format(
+        '  Stray:\n'
+        '    description: Stray paths.\n'
+        '    expr: !python watching_stray_plugin:stray\n'
+        '    settings: !settings\n'
+        '      included: [~+/a.py]\n'
+        '      excluded: []\n'
+        '      allow_ignore: yes\n'
+    ))
+    save(tmpdir.join('a.py'), 'x = 1\n')
+    watcher = make_watcher(tmpdir)
+
+    fixed, added, errors = watcher.poll()
+    assert (violations(added), errors) == ([('a.py', 1, 'Stray')], [])